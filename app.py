@@ -1,8 +1,13 @@
 import os
 import re
 import sqlite3
-from datetime import datetime
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from urllib.parse import unquote
+import click
 from flask import Flask, request, jsonify, send_from_directory, render_template, url_for
 from werkzeug.utils import secure_filename
 
@@ -11,6 +16,21 @@ UPLOAD_FOLDER = BASE_DIR / 'uploads'
 INSTANCE_FOLDER = BASE_DIR / 'instance'
 DB_PATH = INSTANCE_FOLDER / 'family_rater.db'
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+IMAGES_PAGE_SIZE = 60  # images per page for the gallery/admin (first page is embedded in the page)
+IMAGES_MAX_PAGE_SIZE = 500  # upper bound for ?limit= on /api/images
+# ORDER BY for the gallery "Sort by" options; ties fall back to newest id first
+IMAGE_SORTS = {
+    'newest': 'i.created_at DESC, i.id DESC',
+    'avg_desc': 'COALESCE(AVG(r.rating), 0) DESC, i.id DESC',
+    'count_desc': 'COUNT(r.id) DESC, i.id DESC',
+}
+VOTE_COMPACT_BATCH = 10000  # vote events folded into ratings per transaction
+VOTE_COMPACT_INTERVAL = 2.0  # seconds between background compaction passes
+VOTE_COMPACT_REQUEST_BATCH = 1000  # most events a single request folds before reading
+VOTE_COMPACT_REQUEST_WAIT_MS = 50  # how long a request waits for the write lock before giving up
+VOTE_SNAPSHOT_EVERY = 100000  # compacted events between ratings snapshots (bounds as-of queries)
+# vote events that can be folded into ratings (see valid_vote_event)
+VALID_VOTE_SQL = "image_id IS NOT NULL AND TRIM(COALESCE(user, '')) != '' AND rating BETWEEN 1 AND 5"
 
 app = Flask(__name__, instance_path=str(INSTANCE_FOLDER), instance_relative_config=True)
 app.config['UPLOAD_FOLDER'] = str(UPLOAD_FOLDER)
@@ -32,20 +52,37 @@ def slugify(s: str) -> str:
 @app.get('/api/all_users')
 def all_users():
     conn = get_db()
+    compact_pending(conn)
     cur = conn.cursor()
-    cur.execute('SELECT DISTINCT user FROM ratings ORDER BY user')
-    users = [row['user'] for row in cur.fetchall()]
+    users = query_users(cur)
     conn.close()
     return jsonify({'users': users})
 
 
+def query_users(cur):
+    cur.execute('SELECT DISTINCT user FROM ratings ORDER BY user')
+    return [row['user'] for row in cur.fetchall()]
+
+
+def query_sets(cur):
+    # include image counts per set (one grouped join instead of a COUNT(*) subquery per set)
+    cur.execute(
+        '''
+        SELECT s.id, s.name, s.slug, s.created_at, COUNT(i.id) AS image_count
+        FROM sets s
+        LEFT JOIN images i ON i.set_id = s.id
+        GROUP BY s.id
+        ORDER BY s.created_at
+        '''
+    )
+    return [dict(row) for row in cur.fetchall()]
+
+
 @app.get('/api/sets')
 def api_sets():
     conn = get_db()
     cur = conn.cursor()
-    # include image counts per set
-    cur.execute('SELECT s.id, s.name, s.slug, s.created_at, (SELECT COUNT(*) FROM images i WHERE i.set_id = s.id) AS image_count FROM sets s ORDER BY s.created_at')
-    sets = [dict(row) for row in cur.fetchall()]
+    sets = query_sets(cur)
     conn.close()
     return jsonify({'sets': sets})
 
@@ -266,32 +303,147 @@ def api_delete_set(set_id):
 # Yes/No voting endpoint
 @app.post('/api/rate_yesno')
 def rate_yesno():
-    image_id = request.json.get('image_id')
-    user = request.json.get('user')
+    user = (request.json.get('user') or '').strip()
     yesno = request.json.get('yesno')
+    try:
+        image_id = int(request.json.get('image_id'))
+    except (TypeError, ValueError):
+        return ('Missing image_id', 400)
+    if not user:
+        return ('Missing user', 400)
     if yesno not in ('Yes', 'No'):
         return jsonify({'error': 'Invalid vote'}), 400
     conn = get_db()
     # Store yes/no as rating 1 for No, 5 for Yes, or add a separate column if needed
     rating = 5 if yesno == 'Yes' else 1
-    now = datetime.utcnow().isoformat()
-    conn.execute('''
-        INSERT INTO ratings (image_id, user, rating, created_at, updated_at)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(image_id, user) DO UPDATE SET rating=excluded.rating, updated_at=excluded.updated_at
-    ''', (image_id, user, rating, now, now))
+    log_vote(conn, image_id, user, rating)
     conn.commit()
     conn.close()
     return jsonify({'status': 'ok'})
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+def get_db(path=DB_PATH):
+    conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     return conn
 
-def init_db():
-    conn = get_db()
+# Votes are appended to vote_events; ratings holds the folded current state.
+# A background thread (start_vote_compactor) folds the log; readers call compact_pending()
+# to fold a small batch first so they usually see their own votes straight away.
+def log_vote(conn, image_id, user, rating):
+    conn.execute(
+        "INSERT INTO vote_events (kind, image_id, user, rating, created_at) VALUES ('vote', ?, ?, ?, ?)",
+        (image_id, user, rating, datetime.utcnow().isoformat())
+    )
+
+def log_reset(conn):
+    # clears every vote logged before it (Remove All Votes)
+    conn.execute("INSERT INTO vote_events (kind, created_at) VALUES ('reset', ?)", (datetime.utcnow().isoformat(),))
+
+def fold_votes(cur, latest):
+    # latest: {(image_id, user): (rating, first_at, last_at)}; votes for deleted images are dropped.
+    # first_at only matters for a new row; an existing row keeps its created_at.
+    cur.executemany(
+        '''
+        INSERT INTO ratings (image_id, user, rating, created_at, updated_at)
+        SELECT ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM images WHERE id = ?)
+        ON CONFLICT(image_id, user) DO UPDATE SET rating=excluded.rating, updated_at=excluded.updated_at
+        ''',
+        [(image_id, user, rating, first_at, last_at, image_id)
+         for (image_id, user), (rating, first_at, last_at) in latest.items()]
+    )
+    latest.clear()
+
+def valid_vote_event(e):
+    # keep in step with VALID_VOTE_SQL
+    return (e['image_id'] is not None and (e['user'] or '').strip() != ''
+            and e['rating'] in (1, 2, 3, 4, 5))
+
+def compact_votes(conn, batch_size=VOTE_COMPACT_BATCH, max_batches=None):
+    """Fold vote events past the compaction watermark into ratings. Returns the number folded."""
     cur = conn.cursor()
+    cur.execute('SELECT (SELECT COALESCE(MAX(id), 0) FROM vote_events) > (SELECT last_event_id FROM vote_compaction WHERE id = 1)')
+    if not cur.fetchone()[0]:
+        return 0
+    folded = 0
+    batches = 0
+    while True:
+        conn.commit()
+        # take the write lock before reading the watermark so concurrent compactions don't overlap
+        cur.execute('BEGIN IMMEDIATE')
+        cur.execute('SELECT last_event_id FROM vote_compaction WHERE id = 1')
+        last_id = cur.fetchone()[0]
+        cur.execute(
+            'SELECT id, kind, image_id, user, rating, created_at FROM vote_events WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, batch_size)
+        )
+        events = cur.fetchall()
+        if not events:
+            conn.commit()
+            return folded
+        latest = {}
+        for e in events:
+            if e['kind'] == 'reset':
+                fold_votes(cur, latest)
+                cur.execute('DELETE FROM ratings')
+            elif not valid_vote_event(e):
+                # logged before the checks existed; ratings could never hold it, so skip it
+                continue
+            else:
+                key = (e['image_id'], e['user'])
+                first_at = latest[key][1] if key in latest else e['created_at']
+                latest[key] = (e['rating'], first_at, e['created_at'])
+        fold_votes(cur, latest)
+        cur.execute('UPDATE vote_compaction SET last_event_id = ? WHERE id = 1', (events[-1]['id'],))
+        cur.execute('SELECT COALESCE(MAX(last_event_id), 0) FROM vote_snapshots')
+        if events[-1]['id'] - cur.fetchone()[0] >= VOTE_SNAPSHOT_EVERY:
+            take_vote_snapshot(cur, events[-1])
+        conn.commit()
+        folded += len(events)
+        batches += 1
+        if len(events) < batch_size or (max_batches and batches >= max_batches):
+            return folded
+
+def take_vote_snapshot(cur, last_event):
+    cur.execute(
+        'INSERT INTO vote_snapshots (last_event_id, taken_at) VALUES (?, ?)',
+        (last_event['id'], last_event['created_at'])
+    )
+    cur.execute(
+        'INSERT INTO vote_snapshot_rows (snapshot_id, image_id, user, rating) '
+        'SELECT ?, image_id, user, rating FROM ratings',
+        (cur.lastrowid,)
+    )
+
+def compact_pending(conn):
+    """Request-path compaction: at most one small batch, skipped if another writer holds the lock."""
+    conn.execute(f'PRAGMA busy_timeout = {VOTE_COMPACT_REQUEST_WAIT_MS}')
+    try:
+        compact_votes(conn, batch_size=VOTE_COMPACT_REQUEST_BATCH, max_batches=1)
+    except sqlite3.OperationalError:
+        # locked: read ratings as they are, the background compactor will catch up
+        conn.rollback()
+    finally:
+        conn.execute('PRAGMA busy_timeout = 5000')
+
+def start_vote_compactor(interval=VOTE_COMPACT_INTERVAL):
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                conn = get_db()
+                try:
+                    compact_votes(conn)
+                finally:
+                    conn.close()
+            except sqlite3.Error as e:
+                app.logger.warning('Vote compaction failed: %s', e)
+    threading.Thread(target=run, name='vote-compactor', daemon=True).start()
+
+def init_db(path=DB_PATH):
+    conn = get_db(path)
+    cur = conn.cursor()
+    # WAL keeps vote inserts cheap and lets readers run alongside them
+    cur.execute('PRAGMA journal_mode=WAL')
     cur.executescript(
         '''
         CREATE TABLE IF NOT EXISTS images (
@@ -316,6 +468,33 @@ def init_db():
             slug TEXT NOT NULL UNIQUE,
             created_at TEXT NOT NULL
         );
+        -- append-only; no secondary indexes so inserts stay sequential
+        CREATE TABLE IF NOT EXISTS vote_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL CHECK (kind IN ('vote', 'reset')),
+            image_id INTEGER,
+            user TEXT,
+            rating INTEGER,
+            created_at TEXT NOT NULL,
+            CHECK (kind = 'reset' OR (image_id IS NOT NULL AND user IS NOT NULL AND rating >= 1 AND rating <= 5))
+        );
+        CREATE TABLE IF NOT EXISTS vote_compaction (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_event_id INTEGER NOT NULL
+        );
+        -- copies of ratings taken while compacting, as of event last_event_id (logged at taken_at)
+        CREATE TABLE IF NOT EXISTS vote_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            last_event_id INTEGER NOT NULL,
+            taken_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS vote_snapshot_rows (
+            snapshot_id INTEGER NOT NULL,
+            image_id INTEGER NOT NULL,
+            user TEXT NOT NULL,
+            rating INTEGER NOT NULL,
+            PRIMARY KEY (snapshot_id, image_id, user)
+        ) WITHOUT ROWID;
         '''
     )
     # Add hidden column if missing
@@ -347,6 +526,18 @@ def init_db():
             cur.execute('UPDATE images SET set_id = ? WHERE set_id IS NULL OR set_id = 0', (default_set_id,))
     except Exception:
         pass
+    # set filters and per-set counts look images up by set_id
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_images_set_id ON images(set_id)')
+    # First run with the vote log: seed it from existing ratings, already compacted.
+    # Only the current vote is known, so it is logged at updated_at: the ratings rows keep their
+    # created_at, but a replay (or an as-of query) treats each seeded vote as cast at updated_at.
+    cur.execute('SELECT 1 FROM vote_compaction WHERE id = 1')
+    if not cur.fetchone():
+        cur.execute(
+            "INSERT INTO vote_events (kind, image_id, user, rating, created_at) "
+            "SELECT 'vote', image_id, user, rating, updated_at FROM ratings ORDER BY updated_at, id"
+        )
+        cur.execute('INSERT INTO vote_compaction (id, last_event_id) SELECT 1, COALESCE(MAX(id), 0) FROM vote_events')
     conn.commit()
     conn.close()
 # Hide/unhide photo
@@ -377,6 +568,9 @@ def delete_all_data():
     conn = get_db()
     conn.execute('DELETE FROM ratings')
     conn.execute('DELETE FROM images')
+    conn.execute('DELETE FROM vote_events')
+    conn.execute('DELETE FROM vote_snapshot_rows')
+    conn.execute('DELETE FROM vote_snapshots')
     conn.commit()
     conn.close()
     # Optionally, remove files from uploads folder (handle subfolders)
@@ -392,22 +586,32 @@ def delete_all_data():
 init_db()
 
 init_db()
+start_vote_compactor()
 
 def allowed_file(filename: str) -> bool:
     ext = os.path.splitext(filename)[1].lower()
     return ext in ALLOWED_EXTENSIONS
 
+def render_page(template, title):
+    # Embed the initial state so the page can render without extra API calls.
+    # ?bootstrap=0 falls back to the old fetch-everything-from-JS behaviour.
+    bootstrap = None
+    if request.args.get('bootstrap') != '0':
+        user = unquote(request.cookies.get('raterName', '')).strip()
+        bootstrap = bootstrap_state(request.args.get('set'), user)
+    return render_template(template, title=title, bootstrap=bootstrap)
+
 @app.route('/')
 def home():
-    return render_template('gallery.html', title='Gallery')
+    return render_page('gallery.html', 'Gallery')
 
 @app.route('/admin')
 def admin():
-    return render_template('admin.html', title='Admin')
+    return render_page('admin.html', 'Admin')
 
 @app.route('/gallery')
 def gallery():
-    return render_template('gallery.html', title='Gallery')
+    return render_page('gallery.html', 'Gallery')
 
 @app.post('/upload')
 def upload():
@@ -480,8 +684,10 @@ def uploaded_file(filename):
 @app.post('/api/remove_votes')
 def remove_votes():
     conn = get_db()
-    conn.execute('DELETE FROM ratings')
+    # logged rather than deleted, so earlier results can still be replayed
+    log_reset(conn)
     conn.commit()
+    compact_pending(conn)
     conn.close()
     return jsonify({'status': 'ok'})
 
@@ -489,6 +695,7 @@ def remove_votes():
 @app.get('/api/download_votes')
 def download_votes():
     conn = get_db()
+    compact_pending(conn)
     cur = conn.cursor()
     cur.execute('''
         SELECT i.filename, r.user, r.rating, r.created_at, r.updated_at
@@ -524,99 +731,151 @@ def image_row_to_dict(row, user_rating=None):
         d['user_rating'] = user_rating
     return d
 
+def query_images(cur, set_param=None, image_id=None, user=None, sort='newest', limit=None, offset=0):
+    """Fetch images with avg/count and set info; with a user, also their own rating (same query)."""
+    params = []
+    user_select = ''
+    user_join = ''
+    if user:
+        # at most one row per (image, user), so it does not skew the counts
+        user_select = ', MAX(ur.rating) AS user_rating'
+        user_join = 'LEFT JOIN ratings ur ON ur.image_id = i.id AND ur.user = ?'
+        params.append(user)
+    where = ''
+    if image_id:
+        where = 'WHERE i.id = ?'
+        params.append(image_id)
+    elif set_param:
+        if str(set_param).isdigit():
+            where = 'WHERE i.set_id = ?'
+            params.append(int(set_param))
+        else:
+            where = 'WHERE s.slug = ?'
+            params.append(set_param)
+    page = ''
+    if limit is not None:
+        page = 'LIMIT ? OFFSET ?'
+        params += [limit, offset]
+    elif offset:
+        page = 'LIMIT -1 OFFSET ?'
+        params.append(offset)
+    cur.execute(
+        f'''
+        SELECT i.id, i.filename, i.created_at,
+               AVG(r.rating) AS avg_rating,
+               COUNT(r.id) AS rating_count,
+               s.name AS set_name, s.slug AS set_slug{user_select}
+        FROM images i
+        LEFT JOIN ratings r ON r.image_id = i.id
+        LEFT JOIN sets s ON s.id = i.set_id
+        {user_join}
+        {where}
+        GROUP BY i.id
+        ORDER BY {IMAGE_SORTS.get(sort, IMAGE_SORTS['newest'])}
+        {page}
+        ''', params
+    )
+    return cur.fetchall()
+
+def images_page(cur, set_param=None, user=None, sort='newest', top=0, limit=IMAGES_PAGE_SIZE, offset=0):
+    """Return (images, next_offset); next_offset is None on the last page. top > 0 caps the whole listing."""
+    if top > 0:
+        limit = min(limit, top - offset)
+        if limit <= 0:
+            return [], None
+    rows = query_images(cur, set_param=set_param, user=user, sort=sort, limit=limit + 1, offset=offset)
+    has_more = len(rows) > limit and (top <= 0 or offset + limit < top)
+    next_offset = offset + limit if has_more else None
+    return [image_row_to_dict(row) for row in rows[:limit]], next_offset
+
+def bootstrap_state(set_param=None, user=''):
+    """Sets, users and the first image page of the selected set, from one DB connection."""
+    conn = get_db()
+    compact_pending(conn)
+    cur = conn.cursor()
+    sets = query_sets(cur)
+    users = query_users(cur)
+    # same default as the set dropdowns: the first set unless one was asked for
+    selected = next((s['slug'] for s in sets if set_param in (s['slug'], str(s['id']))), None)
+    if selected is None and sets:
+        selected = sets[0]['slug']
+    images, next_offset = [], None
+    if selected:
+        images, next_offset = images_page(cur, set_param=selected, user=user or None)
+    conn.close()
+    return {
+        'sets': sets,
+        'users': users,
+        'set': selected,
+        'user': user,
+        'images': images,
+        'next_offset': next_offset,
+        'sort': 'newest',
+        'top': 0,
+        'page_size': IMAGES_PAGE_SIZE,
+    }
+
 @app.get('/api/images')
 def api_images():
     # Optional query: id=single image id
     # Optional: include_user_rating=1&user=Name
+    # Optional paging: limit=N&offset=M (response then carries next_offset, null on the last page)
+    # Optional: sort=newest|avg_desc|count_desc&top=N (applied over the whole set, before paging)
     image_id = request.args.get('id')
     include_user = request.args.get('include_user_rating') == '1'
     user = request.args.get('user', '')
+    limit = request.args.get('limit', type=int)
+    offset = max(0, request.args.get('offset', 0, type=int))
+    sort = request.args.get('sort', 'newest')
+    top = max(0, request.args.get('top', 0, type=int))
+    if limit is not None:
+        limit = max(1, min(limit, IMAGES_MAX_PAGE_SIZE))
 
     conn = get_db()
+    compact_pending(conn)
     cur = conn.cursor()
     # optional set filter: accept numeric id or slug via ?set= or ?set_id=
     set_param = request.args.get('set') or request.args.get('set_id')
-    if image_id:
-        cur.execute(
-            '''
-            SELECT i.id, i.filename, i.created_at,
-                   AVG(r.rating) AS avg_rating,
-                   COUNT(r.id) AS rating_count,
-                   s.name AS set_name, s.slug AS set_slug
-            FROM images i
-            LEFT JOIN ratings r ON r.image_id = i.id
-            LEFT JOIN sets s ON s.id = i.set_id
-            WHERE i.id = ?
-            GROUP BY i.id
-            ORDER BY i.id DESC
-            ''', (image_id,)
-        )
-    else:
-        # build a query that optionally filters by set id or slug
-        if set_param:
-            if str(set_param).isdigit():
-                cur.execute(
-                    '''
-                    SELECT i.id, i.filename, i.created_at,
-                           AVG(r.rating) AS avg_rating,
-                           COUNT(r.id) AS rating_count,
-                           s.name AS set_name, s.slug AS set_slug
-                    FROM images i
-                    LEFT JOIN ratings r ON r.image_id = i.id
-                    LEFT JOIN sets s ON s.id = i.set_id
-                    WHERE i.set_id = ?
-                    GROUP BY i.id
-                    ORDER BY i.id DESC
-                    ''', (int(set_param),)
-                )
-            else:
-                cur.execute(
-                    '''
-                    SELECT i.id, i.filename, i.created_at,
-                           AVG(r.rating) AS avg_rating,
-                           COUNT(r.id) AS rating_count,
-                           s.name AS set_name, s.slug AS set_slug
-                    FROM images i
-                    LEFT JOIN ratings r ON r.image_id = i.id
-                    LEFT JOIN sets s ON s.id = i.set_id
-                    WHERE s.slug = ?
-                    GROUP BY i.id
-                    ORDER BY i.id DESC
-                    ''', (set_param,)
-                )
-        else:
-            cur.execute(
-                '''
-                SELECT i.id, i.filename, i.created_at,
-                       AVG(r.rating) AS avg_rating,
-                       COUNT(r.id) AS rating_count,
-                       s.name AS set_name, s.slug AS set_slug
-                FROM images i
-                LEFT JOIN ratings r ON r.image_id = i.id
-                LEFT JOIN sets s ON s.id = i.set_id
-                GROUP BY i.id
-                ORDER BY i.id DESC
-                '''
-            )
-    rows = cur.fetchall()
-    images = []
-    if include_user and user:
-        # fetch user ratings in one query
-        ids = [row['id'] for row in rows]
-        user_ratings = {}
-        if ids:
-            qmarks = ','.join('?' for _ in ids)
-            cur.execute(f'SELECT image_id, rating FROM ratings WHERE user = ? AND image_id IN ({qmarks})', [user] + ids)
-            for r in cur.fetchall():
-                user_ratings[r['image_id']] = r['rating']
-        for row in rows:
-            images.append(image_row_to_dict(row, user_ratings.get(row['id'])))
-    else:
-        for row in rows:
-            images.append(image_row_to_dict(row))
+    user = user if include_user and user else None
+    if limit is not None and not image_id:
+        images, next_offset = images_page(cur, set_param=set_param, user=user, sort=sort, top=top, limit=limit, offset=offset)
+        conn.close()
+        return jsonify({'images': images, 'next_offset': next_offset})
+    rows = query_images(cur, set_param=set_param, image_id=image_id, user=user, sort=sort, offset=offset)
+    images = [image_row_to_dict(row) for row in rows]
     conn.close()
     return jsonify({'images': images})
 
+def file_size(filename):
+    try:
+        return (UPLOAD_FOLDER / filename).stat().st_size
+    except OSError:
+        return None
+
+@app.get('/api/images/manifest')
+def api_images_manifest():
+    """Ordered fullscreen queue for a user and set, with byte sizes for the client preloader."""
+    # Optional: set=<id|slug>&user=Name&sort=newest|avg_desc|count_desc&top=N
+    set_param = request.args.get('set') or request.args.get('set_id')
+    user = request.args.get('user', '').strip()
+    sort = request.args.get('sort', 'newest')
+    top = request.args.get('top', 0, type=int)
+    conn = get_db()
+    compact_pending(conn)
+    cur = conn.cursor()
+    rows = query_images(cur, set_param=set_param, user=user or None, sort=sort, limit=top if top > 0 else None)
+    conn.close()
+    images = []
+    for row in rows:
+        images.append({
+            'id': row['id'],
+            'filename': row['filename'],
+            'url': url_for('uploaded_file', filename=row['filename']),
+            'bytes': file_size(row['filename']),
+            'user_rating': row['user_rating'] if user else None,
+        })
+    return jsonify({'images': images, 'total_bytes': sum(i['bytes'] or 0 for i in images)})
+
 @app.post('/api/rate')
 def api_rate():
     data = request.get_json(force=True)
@@ -627,14 +886,9 @@ def api_rate():
         return ('Missing user', 400)
     if rating < 1 or rating > 5:
         return ('Rating must be 1–5', 400)
-    # upsert rating for (image_id, user)
+    # latest vote per (image_id, user) wins when the log is compacted
     conn = get_db()
-    cur = conn.cursor()
-    now = datetime.utcnow().isoformat()
-    # Try update first
-    cur.execute('UPDATE ratings SET rating=?, updated_at=? WHERE image_id=? AND user=?', (rating, now, image_id, user))
-    if cur.rowcount == 0:
-        cur.execute('INSERT INTO ratings (image_id, user, rating, created_at, updated_at) VALUES (?, ?, ?, ?, ?)', (image_id, user, rating, now, now))
+    log_vote(conn, image_id, user, rating)
     conn.commit()
     conn.close()
     return jsonify({'ok': True})
@@ -643,6 +897,7 @@ def api_rate():
 def api_top():
     limit = int(request.args.get('limit', '5'))
     conn = get_db()
+    compact_pending(conn)
     cur = conn.cursor()
     # optional set filter (id or slug)
     set_param = request.args.get('set') or request.args.get('set_id')
@@ -709,5 +964,207 @@ def api_top():
     conn.close()
     return jsonify({'images': images})
 
+def parse_as_of(value):
+    """ISO date/time -> naive UTC ISO string (the form vote_events.created_at uses), or None if it doesn't parse."""
+    try:
+        ts = datetime.fromisoformat((value or '').strip())
+    except ValueError:
+        return None
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts.isoformat()
+
+def query_results_as_of(cur, as_of, set_param=None):
+    """Images with avg/count computed from the vote log as it stood at as_of (UTC ISO timestamp)."""
+    # Start from the newest snapshot taken at or before as_of and replay only the events after it,
+    # up to the next snapshot (events are logged in time order), so at most ~VOTE_SNAPSHOT_EVERY
+    # events are scanned however long the log is.
+    cur.execute('SELECT id, last_event_id FROM vote_snapshots WHERE taken_at <= ? ORDER BY id DESC LIMIT 1', (as_of,))
+    snap = cur.fetchone()
+    snapshot_id, start_id = (snap['id'], snap['last_event_id']) if snap else (0, 0)
+    cur.execute('SELECT MIN(last_event_id) FROM vote_snapshots WHERE taken_at > ?', (as_of,))
+    end_id = cur.fetchone()[0] or 2 ** 63 - 1
+    # a reset in that range clears the snapshot as well
+    cur.execute(
+        "SELECT MAX(id) FROM vote_events WHERE kind = 'reset' AND id > ? AND id <= ? AND created_at <= ?",
+        (start_id, end_id, as_of)
+    )
+    reset_id = cur.fetchone()[0]
+    if reset_id:
+        snapshot_id, start_id = 0, reset_id
+    params = [start_id, end_id, as_of, snapshot_id]
+    where = ''
+    if set_param:
+        if str(set_param).isdigit():
+            where = 'WHERE i.set_id = ?'
+            params.append(int(set_param))
+        else:
+            where = 'WHERE s.slug = ?'
+            params.append(set_param)
+    # latest vote per (image, user): events beat snapshot rows (seq 0); SQLite takes the bare
+    # rating column from the row holding MAX(seq)
+    cur.execute(
+        f'''
+        SELECT i.id, i.filename, i.created_at,
+               AVG(v.rating) AS avg_rating,
+               COUNT(v.image_id) AS rating_count,
+               s.name AS set_name, s.slug AS set_slug
+        FROM images i
+        LEFT JOIN (
+            SELECT image_id, rating, MAX(seq)
+            FROM (
+                SELECT image_id, user, rating, id AS seq FROM vote_events
+                WHERE kind = 'vote' AND {VALID_VOTE_SQL} AND id > ? AND id <= ? AND created_at <= ?
+                UNION ALL
+                SELECT image_id, user, rating, 0 AS seq FROM vote_snapshot_rows WHERE snapshot_id = ?
+            )
+            GROUP BY image_id, user
+        ) v ON v.image_id = i.id
+        LEFT JOIN sets s ON s.id = i.set_id
+        {where}
+        GROUP BY i.id
+        ORDER BY i.id DESC
+        ''', params
+    )
+    return cur.fetchall()
+
+@app.get('/api/results')
+def api_results():
+    # Required: as_of=<ISO timestamp, UTC unless it has an offset, e.g. 2025-06-01T18:00:00>; optional set=<id|slug>
+    if not (request.args.get('as_of') or '').strip():
+        return ('Missing as_of', 400)
+    as_of = parse_as_of(request.args.get('as_of'))
+    if as_of is None:
+        return ('Invalid as_of', 400)
+    set_param = request.args.get('set') or request.args.get('set_id')
+    conn = get_db()
+    cur = conn.cursor()
+    images = [image_row_to_dict(row) for row in query_results_as_of(cur, as_of, set_param)]
+    conn.close()
+    return jsonify({'as_of': as_of, 'images': images})
+
+def replay_votes(dest_path, as_of=None):
+    """Build a fresh database at dest_path from this one's sets, images and vote log (up to as_of)."""
+    init_db(dest_path)
+    conn = get_db(dest_path)
+    conn.execute('ATTACH DATABASE ? AS src', (str(DB_PATH),))
+    conn.execute('DELETE FROM sets')
+    conn.execute('INSERT INTO sets (id, name, slug, created_at) SELECT id, name, slug, created_at FROM src.sets')
+    conn.execute(
+        'INSERT INTO images (id, filename, created_at, hidden, set_id) '
+        'SELECT id, filename, created_at, hidden, set_id FROM src.images'
+    )
+    conn.execute(
+        'INSERT INTO vote_events (id, kind, image_id, user, rating, created_at) '
+        'SELECT id, kind, image_id, user, rating, created_at FROM src.vote_events '
+        'WHERE ? IS NULL OR created_at <= ? ORDER BY id',
+        (as_of, as_of)
+    )
+    conn.commit()
+    conn.execute('DETACH DATABASE src')
+    folded = compact_votes(conn)
+    conn.close()
+    return folded
+
+@app.cli.command('compact-votes')
+def compact_votes_command():
+    """Fold pending vote events into the ratings table."""
+    conn = get_db()
+    started = time.perf_counter()
+    folded = compact_votes(conn)
+    conn.close()
+    click.echo(f'Folded {folded} events in {time.perf_counter() - started:.2f}s')
+
+@app.cli.command('replay-votes')
+@click.argument('dest', type=click.Path(dir_okay=False))
+@click.option('--as-of', default=None, help='Only replay events up to this ISO timestamp (UTC unless it has an offset).')
+def replay_votes_command(dest, as_of):
+    """Replay the vote log into a fresh database file DEST."""
+    if Path(dest).exists():
+        raise click.ClickException(f'{dest} already exists')
+    if as_of is not None:
+        parsed = parse_as_of(as_of)
+        if parsed is None:
+            raise click.ClickException(f'Invalid --as-of timestamp: {as_of}')
+        as_of = parsed
+    started = time.perf_counter()
+    folded = replay_votes(dest, as_of)
+    click.echo(f'Replayed {folded} events into {dest} in {time.perf_counter() - started:.2f}s')
+
+@app.cli.command('bench-votes')
+@click.option('--events', default=2_000_000, help='Size of the vote log to compact.')
+@click.option('--images', default=1000, help='Number of images voted on.')
+@click.option('--users', default=50, help='Number of distinct voters.')
+@click.option('--sample', default=5000, help='Votes timed one request (one commit) at a time.')
+def bench_votes_command(events, images, users, sample):
+    """Benchmark vote ingestion and compaction on a throwaway database."""
+    import random
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bench.db'
+        init_db(path)
+        conn = get_db(path)
+        now = datetime.utcnow().isoformat()
+        conn.executemany(
+            'INSERT INTO images (filename, created_at, set_id) VALUES (?, ?, 1)',
+            [(f'default/{n}.jpg', now) for n in range(images)]
+        )
+        conn.commit()
+        votes = [(rng.randint(1, images), f'user{rng.randrange(users)}', rng.randint(1, 5)) for _ in range(sample)]
+
+        # ingestion as the endpoints do it: one vote per commit
+        started = time.perf_counter()
+        for image_id, user, rating in votes:
+            ts = datetime.utcnow().isoformat()
+            conn.execute(
+                '''
+                INSERT INTO ratings (image_id, user, rating, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(image_id, user) DO UPDATE SET rating=excluded.rating, updated_at=excluded.updated_at
+                ''', (image_id, user, rating, ts, ts)
+            )
+            conn.commit()
+        upsert_secs = time.perf_counter() - started
+        conn.execute('DELETE FROM ratings')
+        conn.commit()
+        started = time.perf_counter()
+        for image_id, user, rating in votes:
+            log_vote(conn, image_id, user, rating)
+            conn.commit()
+        append_secs = time.perf_counter() - started
+        click.echo(f'Ingestion, {sample} votes one commit each:')
+        click.echo(f'  ratings upsert  {sample / upsert_secs:12,.0f} votes/s')
+        click.echo(f'  vote_events log {sample / append_secs:12,.0f} votes/s')
+
+        # grow the log to the requested size in bulk (one vote per millisecond), then compact all of it
+        log_start = datetime.utcnow()
+        remaining = max(0, events - sample)
+        chunk = 100_000
+        logged = 0
+        while remaining:
+            n = min(chunk, remaining)
+            conn.executemany(
+                "INSERT INTO vote_events (kind, image_id, user, rating, created_at) VALUES ('vote', ?, ?, ?, ?)",
+                [(rng.randint(1, images), f'user{rng.randrange(users)}', rng.randint(1, 5),
+                  (log_start + timedelta(milliseconds=logged + k)).isoformat()) for k in range(n)]
+            )
+            conn.commit()
+            logged += n
+            remaining -= n
+        started = time.perf_counter()
+        folded = compact_votes(conn)
+        compact_secs = time.perf_counter() - started
+        click.echo(f'Compaction of {folded:,} events (batch {VOTE_COMPACT_BATCH}):')
+        click.echo(f'  {compact_secs:.2f}s, {folded / compact_secs:,.0f} events/s')
+
+        click.echo(f'Results as of a point in the log (snapshot every {VOTE_SNAPSHOT_EVERY:,} events):')
+        cur = conn.cursor()
+        for fraction in (0.01, 0.5, 1.0):
+            as_of = (log_start + timedelta(milliseconds=int(logged * fraction))).isoformat()
+            started = time.perf_counter()
+            query_results_as_of(cur, as_of)
+            click.echo(f'  at {fraction:>4.0%} of the log: {(time.perf_counter() - started) * 1000:,.0f} ms')
+        conn.close()
+
 if __name__ == '__main__':
     app.run(debug=True)
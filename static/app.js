@@ -5,6 +5,11 @@ function getName() {
 }
 function setName(name) {
   localStorage.setItem('raterName', name.trim());
+  syncNameCookie();
+}
+// The server reads this cookie to embed the user's own ratings in the page
+function syncNameCookie() {
+  document.cookie = 'raterName=' + encodeURIComponent(getName()) + '; path=/; max-age=31536000; SameSite=Lax';
 }
 function starHTML(value, current) {
   let html = '';
@@ -14,6 +19,45 @@ function starHTML(value, current) {
   }
   return html;
 }
+// Initial state embedded by the server (sets, users, first page of images for the selected set).
+// It replaces the first round of API calls only; later loads go through the API as before.
+const BOOTSTRAP = (() => {
+  const el = document.getElementById('bootstrap-data');
+  if (!el) return null;
+  try { return JSON.parse(el.textContent); } catch (e) { return null; }
+})();
+const PAGE_SIZE = BOOTSTRAP?.page_size || 60;
+function takeBootstrap(key) {
+  if (!BOOTSTRAP || !(key in BOOTSTRAP)) return undefined;
+  const value = BOOTSTRAP[key];
+  delete BOOTSTRAP[key];
+  return value;
+}
+// embedded first page, if it was built for this set, sort and top filter (and user, when given)
+function takeBootstrapImages(setSlug, user, sort = 'newest', top = 0) {
+  if (!BOOTSTRAP || !BOOTSTRAP.images) return null;
+  if (BOOTSTRAP.set !== setSlug || BOOTSTRAP.sort !== sort || BOOTSTRAP.top !== top) return null;
+  if (user !== undefined && BOOTSTRAP.user !== user) return null;
+  return { images: takeBootstrap('images'), next_offset: BOOTSTRAP.next_offset };
+}
+async function getSets(useBootstrap) {
+  if (useBootstrap && BOOTSTRAP?.sets) return BOOTSTRAP.sets;
+  const data = await fetchJSON('/api/sets');
+  return data.sets;
+}
+// Time to first image on a cold load (compare against /gallery?bootstrap=0)
+let firstImageTimed = false;
+function timeFirstImage(imgEl) {
+  if (firstImageTimed || !imgEl) return;
+  firstImageTimed = true;
+  const report = () => {
+    performance.mark('first-image');
+    const mode = document.getElementById('bootstrap-data') ? 'bootstrap' : 'api';
+    console.info(`Time to first image: ${Math.round(performance.now())} ms (${mode})`);
+  };
+  if (imgEl.complete) report();
+  else imgEl.addEventListener('load', report, { once: true });
+}
 async function fetchJSON(url) {
   const res = await fetch(url);
   if (!res.ok) throw new Error('Failed: ' + res.status);
@@ -40,13 +84,26 @@ async function loadStats() {
   const setSelect = document.getElementById('set-select');
   const sel = statsSel?.value ? statsSel : setSelect;
   const setParam = sel?.value ? ('?set=' + encodeURIComponent(sel.value)) : '';
-    const data = await fetchJSON('/api/images' + setParam);
+    const boot = takeBootstrapImages(sel?.value || '');
+    const data = boot || await fetchJSON('/api/images' + setParam);
     const tbody = document.querySelector('#stats-table tbody');
     if (!tbody) return;
   // remember which set is currently shown
   tbody.dataset.currentSet = sel?.value || '';
   tbody.innerHTML = '';
-    for (const img of data.images) {
+    appendStatsRows(tbody, data.images);
+    timeFirstImage(tbody.querySelector('img'));
+    // the embedded page is only the first one; fetch the rest of the set behind it
+    if (boot && boot.next_offset != null) {
+      const rest = await fetchJSON('/api/images' + setParam + '&offset=' + boot.next_offset);
+      appendStatsRows(tbody, rest.images);
+    }
+  } catch (e) {
+    console.error(e);
+  }
+}
+function appendStatsRows(tbody, images) {
+    for (const img of images) {
       const tr = document.createElement('tr');
       tr.innerHTML = `
   <td><img src="${img.url}" alt=""></td>
@@ -61,9 +118,6 @@ async function loadStats() {
       `;
       tbody.appendChild(tr);
     }
-  } catch (e) {
-    console.error(e);
-  }
 }
 async function loadTop() {
   const n = parseInt(document.getElementById('top-n').value || '5', 10);
@@ -121,14 +175,15 @@ async function loadGallery() {
   const gallerySet = document.getElementById('gallery-set-select');
   if (gallerySet && !gallerySet.dataset.loaded) {
     try {
-      const data = await fetchJSON('/api/sets');
+      const sets = await getSets(true);
       gallerySet.innerHTML = '';
-      for (const s of data.sets) {
+      for (const s of sets) {
         const opt = document.createElement('option');
         opt.value = s.slug;
         opt.textContent = s.name;
         gallerySet.appendChild(opt);
       }
+      if (BOOTSTRAP?.set) gallerySet.value = BOOTSTRAP.set;
       gallerySet.dataset.loaded = '1';
       gallerySet.onchange = () => loadGallery();
     } catch (e) {
@@ -136,32 +191,46 @@ async function loadGallery() {
     }
   }
 
+  const gallerySetSel = document.getElementById('gallery-set-select');
   const sortBy = document.getElementById('sort-by').value;
   const topFilter = parseInt(document.getElementById('top-filter').value || '0', 10);
+  let data = takeBootstrapImages(gallerySetSel?.value || '', getName(), sortBy, topFilter);
+  if (!data) data = await fetchJSON(galleryImagesURL(0));
+  galleryImages = data.images;
+  galleryNextOffset = data.next_offset;
+  renderGallery();
+}
 
-  const name = encodeURIComponent(getName());
-  let url = '/api/images?include_user_rating=1';
+// Images loaded so far for the selected set, already sorted and top-filtered by the server;
+// further pages are fetched by "Load more"
+let galleryImages = [], galleryNextOffset = null;
+function galleryImagesURL(offset) {
+  let url = `/api/images?include_user_rating=1&limit=${PAGE_SIZE}&offset=${offset}`;
   const gallerySetSel = document.getElementById('gallery-set-select');
   if (gallerySetSel && gallerySetSel.value) url += '&set=' + encodeURIComponent(gallerySetSel.value);
+  const name = encodeURIComponent(getName());
   if (name) url += '&user=' + name;
-  const data = await fetchJSON(url);
-  let images = data.images;
-
-  // sort
-  if (sortBy === 'avg_desc') {
-    images.sort((a,b) => (b.avg_rating || 0) - (a.avg_rating || 0));
-  } else if (sortBy === 'count_desc') {
-    images.sort((a,b) => (b.rating_count || 0) - (a.rating_count || 0));
-  } else {
-    images.sort((a,b) => b.created_at.localeCompare(a.created_at)); // newest
+  url += '&sort=' + encodeURIComponent(document.getElementById('sort-by').value);
+  url += '&top=' + (parseInt(document.getElementById('top-filter').value || '0', 10) || 0);
+  return url;
+}
+async function loadMoreGallery() {
+  if (galleryNextOffset == null) return;
+  try {
+    const data = await fetchJSON(galleryImagesURL(galleryNextOffset));
+    galleryImages = galleryImages.concat(data.images);
+    galleryNextOffset = data.next_offset;
+    renderGallery();
+  } catch (e) {
+    console.error('Failed to load more images', e);
   }
-
-  if (topFilter > 0) images = images.slice(0, topFilter);
-
+}
+function renderGallery() {
+  const images = galleryImages;
   const grid = document.getElementById('gallery');
   if (!grid) return;
   grid.innerHTML = '';
-  for (const [i, img] of images.entries()) {
+  for (const img of images) {
     const userRating = img.user_rating || 0;
     const card = document.createElement('div');
     card.className = 'card-img';
@@ -175,25 +244,12 @@ async function loadGallery() {
       </div>
     `;
     // Double-click to start fullscreen at this image
-    card.addEventListener('dblclick', () => {
-      // Gather images from gallery for fullscreen
-      fsImages = Array.from(document.querySelectorAll('#gallery .card-img')).map(card => {
-        const imgEl = card.querySelector('img');
-        const id = card.querySelector('.stars').dataset.imageId;
-        const userRating = card.querySelectorAll('.star.filled').length;
-        return {
-          url: imgEl.src,
-          filename: imgEl.alt,
-          id: parseInt(id, 10),
-          user_rating: userRating
-        };
-      });
-      document.getElementById('fullscreen-view').style.display = 'flex';
-  showFSImage(i);
-      document.body.style.overflow = 'hidden';
-    });
+    card.addEventListener('dblclick', () => window.openFullscreen?.(img.id));
     grid.appendChild(card);
   }
+  timeFirstImage(grid.querySelector('img'));
+  const loadMore = document.getElementById('load-more');
+  if (loadMore) loadMore.style.display = galleryNextOffset == null ? 'none' : '';
 
   // star click handlers
   for (const stars of document.querySelectorAll('.stars')) {
@@ -214,6 +270,9 @@ async function loadGallery() {
           const v = parseInt(s.dataset.value, 10);
           s.classList.toggle('filled', v <= rating);
         }
+        // keep the loaded list in step, so re-rendering (e.g. Load more) keeps the new rating
+        const loaded = galleryImages.find(img => img.id === imageId);
+        if (loaded) loaded.user_rating = rating;
         // refresh the card's meta with new avg/count
         await refreshCardMeta(imageId, stars.closest('.card-img').querySelector('.meta'));
       } catch (e) {
@@ -227,7 +286,8 @@ async function populateUserDropdown() {
   const userDropdown = document.getElementById('user-dropdown');
   const nameInput = document.getElementById('rater-name');
   if (userDropdown) {
-    const res = await fetchJSON('/api/all_users');
+    const bootUsers = takeBootstrap('users');
+    const res = bootUsers ? { users: bootUsers } : await fetchJSON('/api/all_users');
     userDropdown.innerHTML = '';
     for (const user of res.users) {
       const opt = document.createElement('option');
@@ -260,6 +320,107 @@ async function refreshCardMeta(imageId, metaEl) {
   }
 }
 
+// Fullscreen queue: the manifest lists every image of the set in gallery order (not just loaded pages)
+async function fetchFSManifest() {
+  const params = new URLSearchParams();
+  const gallerySetSel = document.getElementById('gallery-set-select');
+  if (gallerySetSel && gallerySetSel.value) params.set('set', gallerySetSel.value);
+  if (getName()) params.set('user', getName());
+  params.set('sort', document.getElementById('sort-by')?.value || 'newest');
+  params.set('top', document.getElementById('top-filter')?.value || '0');
+  const data = await fetchJSON('/api/images/manifest?' + params);
+  return data.images;
+}
+
+// Fullscreen preloader: keeps the next few images fetched and decoded so advancing doesn't wait
+// on the network. Bounded by entry count and bytes; fetches that fall out of range are aborted.
+// ?preload=0 turns it off (to compare the advance wait times logged below).
+const FS_PRELOAD = new URLSearchParams(location.search).get('preload') !== '0';
+const FS_PRELOAD_AHEAD = 3;
+const FS_CACHE_MAX = 8;
+const FS_CACHE_MAX_BYTES = 64 * 1024 * 1024;
+const fsCache = new Map(); // url -> { controller, ready, done, bytes, objectURL, image }; oldest first
+let fsCurrentURL = null; // image on screen; never evicted, its object URL may be the <img> src
+function fsCacheGet(img) {
+  let entry = fsCache.get(img.url);
+  if (entry) {
+    // move to the back (most recently used)
+    fsCache.delete(img.url);
+    fsCache.set(img.url, entry);
+    return entry;
+  }
+  entry = { controller: new AbortController(), done: false, bytes: img.bytes || 0, objectURL: null, image: null };
+  entry.ready = fetch(img.url, { signal: entry.controller.signal })
+    .then(res => {
+      if (!res.ok) throw new Error('Failed: ' + res.status);
+      return res.blob();
+    })
+    .then(async blob => {
+      entry.bytes = blob.size;
+      entry.objectURL = URL.createObjectURL(blob);
+      entry.image = new Image();
+      entry.image.src = entry.objectURL;
+      await entry.image.decode();
+      entry.done = true;
+      return entry.objectURL;
+    });
+  entry.ready.catch(() => {
+    if (fsCache.get(img.url) === entry) fsCache.delete(img.url);
+  });
+  fsCache.set(img.url, entry);
+  fsCacheTrim();
+  return entry;
+}
+function fsCacheEvict(url, entry) {
+  if (!entry.done) entry.controller.abort();
+  if (entry.objectURL) URL.revokeObjectURL(entry.objectURL);
+  fsCache.delete(url);
+}
+function fsCacheTrim() {
+  let total = 0;
+  for (const entry of fsCache.values()) total += entry.bytes;
+  for (const [url, entry] of fsCache) {
+    if (fsCache.size <= FS_CACHE_MAX && total <= FS_CACHE_MAX_BYTES) break;
+    if (url === fsCurrentURL) continue;
+    total -= entry.bytes;
+    fsCacheEvict(url, entry);
+  }
+}
+function fsCacheClear() {
+  fsCurrentURL = null;
+  for (const [url, entry] of fsCache) fsCacheEvict(url, entry);
+}
+function fsPreloadAround(images, idx) {
+  if (!FS_PRELOAD || !images.length) return;
+  const wanted = [];
+  for (let k = 1; k <= Math.min(FS_PRELOAD_AHEAD, images.length - 1); k++) {
+    wanted.push(images[(idx + k) % images.length]);
+  }
+  const keep = new Set([images[idx].url, ...wanted.map(img => img.url)]);
+  // stale fetches (user jumped or went back) are no longer worth the bandwidth
+  for (const [url, entry] of fsCache) {
+    if (!entry.done && !keep.has(url)) fsCacheEvict(url, entry);
+  }
+  for (const img of wanted) fsCacheGet(img);
+}
+
+// Per-advance wait: time from showing an image until it is decoded on screen
+const fsWaits = [];
+function recordFSWait(ms, preloaded) {
+  fsWaits.push(ms);
+  console.info(`Fullscreen advance wait: ${Math.round(ms)} ms (${preloaded ? 'preloaded' : 'network'})`);
+}
+function logFSWaitSummary() {
+  if (!fsWaits.length) return;
+  const sorted = fsWaits.slice().sort((a, b) => a - b);
+  const mean = sorted.reduce((a, b) => a + b, 0) / sorted.length;
+  const median = sorted[Math.floor(sorted.length / 2)];
+  const p95 = sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * 0.95))];
+  console.info(`Fullscreen advance wait over ${sorted.length} images (preload ${FS_PRELOAD ? 'on' : 'off'}): ` +
+    `mean ${Math.round(mean)} ms, median ${Math.round(median)} ms, p95 ${Math.round(p95)} ms`);
+  fsWaits.length = 0;
+}
+
 // Wire up
 window.addEventListener('DOMContentLoaded', () => {
   // Yes/No voting in fullscreen
@@ -316,16 +477,15 @@ window.addEventListener('DOMContentLoaded', () => {
     upForm.addEventListener('submit', handleUpload);
     document.getElementById('refresh-stats')?.addEventListener('click', loadStats);
     document.getElementById('load-top')?.addEventListener('click', loadTop);
-    loadStats();
 
     // load sets for admin
-    async function loadSets() {
+    async function loadSets(useBootstrap = false) {
       const sel = document.getElementById('set-select');
       if (!sel) return;
       sel.innerHTML = '';
       try {
-        const data = await fetchJSON('/api/sets');
-        for (const s of data.sets) {
+        const sets = await getSets(useBootstrap);
+        for (const s of sets) {
           const opt = document.createElement('option');
           opt.value = s.slug;
           opt.textContent = `${s.name} (${s.image_count || 0})`;
@@ -371,16 +531,14 @@ window.addEventListener('DOMContentLoaded', () => {
       }
     });
 
-    // initial sets
-    loadSets();
     // populate stats set selector too
-    async function loadStatsSets() {
+    async function loadStatsSets(useBootstrap = false) {
       const sel = document.getElementById('stats-set-select');
       if (!sel) return;
       sel.innerHTML = '';
       try {
-        const data = await fetchJSON('/api/sets');
-        for (const s of data.sets) {
+        const sets = await getSets(useBootstrap);
+        for (const s of sets) {
           const opt = document.createElement('option');
           opt.value = s.slug;
           opt.textContent = `${s.name} (${s.image_count || 0})`;
@@ -391,7 +549,8 @@ window.addEventListener('DOMContentLoaded', () => {
         console.error('Failed to load stats sets', e);
       }
     }
-    loadStatsSets();
+    // initial sets; fill the selectors first so the initial stats respect the selected set
+    Promise.all([loadSets(true), loadStatsSets(true)]).then(loadStats);
   document.getElementById('filter-set')?.addEventListener('click', () => { 
     // when user clicks Show Set, reload stats for the selected set
     loadStats();
@@ -542,9 +701,12 @@ window.addEventListener('DOMContentLoaded', () => {
     document.getElementById('apply-filters').addEventListener('click', () => {
       loadGallery();
     });
+    document.getElementById('load-more')?.addEventListener('click', loadMoreGallery);
     // preload name
     const nm = getName();
     if (nm) document.getElementById('rater-name').value = nm;
+    // names saved before the cookie existed
+    if (nm) syncNameCookie();
     loadGallery();
 
     // Fullscreen gallery logic
@@ -566,7 +728,7 @@ function showFSImage(idx) {
   const fsStars = document.getElementById('fs-stars');
   const fsRating = document.getElementById('fs-rating');
   fsImg.style.display = 'block';
-  fsImg.src = img.url;
+  displayFSImage(fsImg, img, fsIndex);
   fsImg.alt = img.filename;
   fsStars.innerHTML = starHTML(5, img.user_rating || 0);
   // update filename caption and progress
@@ -595,6 +757,59 @@ function showFSImage(idx) {
   }
 }
 
+async function displayFSImage(fsImg, img, idx) {
+  const started = performance.now();
+  // Swap the picture in the same tick as the caption/stars so votes always match what is shown:
+  // use the decoded copy if it is ready, otherwise the plain URL (an in-flight prefetch keeps going).
+  let src = img.url;
+  let preloaded = false;
+  if (FS_PRELOAD) {
+    fsCurrentURL = img.url;
+    const entry = fsCache.get(img.url);
+    if (entry && entry.done) {
+      fsCacheGet(img); // mark as recently used
+      src = entry.objectURL;
+      preloaded = true;
+    }
+  }
+  if (fsImg.getAttribute('src') !== src) {
+    // on a miss the browser may keep painting the previous picture until this one loads
+    fsImg.style.visibility = preloaded ? 'visible' : 'hidden';
+    fsImg.src = src;
+    try {
+      await fsImg.decode();
+      if (fsIndex === idx) recordFSWait(performance.now() - started, preloaded);
+    } catch (e) {
+      // replaced by a newer src, or broken image
+    }
+    if (fsIndex === idx) fsImg.style.visibility = 'visible';
+  }
+  // preload only once the current image is on screen
+  if (FS_PRELOAD && fsIndex === idx && fsImages[idx] === img) fsPreloadAround(fsImages, idx);
+}
+
+    async function openFullscreen(startId) {
+      try {
+        fsImages = await fetchFSManifest();
+      } catch (e) {
+        console.error('Failed to load fullscreen queue', e);
+        return;
+      }
+      if (!fsImages.length) return;
+      const start = Math.max(0, fsImages.findIndex(img => img.id === startId));
+      fsView.style.display = 'flex';
+      showFSImage(start);
+      document.body.style.overflow = 'hidden';
+    }
+    window.openFullscreen = openFullscreen;
+    function closeFullscreen() {
+      fsView.style.display = 'none';
+      document.body.style.overflow = '';
+      fsCacheClear();
+      logFSWaitSummary();
+      loadGallery(); // Refresh gallery ratings after exiting fullscreen
+    }
+
     async function rateFSImage(val) {
       const img = fsImages[fsIndex];
       const name = getName().trim();
@@ -621,23 +836,8 @@ function showFSImage(idx) {
       }
     }
 
-    fsBtn.addEventListener('click', () => {
-      // Gather images from gallery
-      fsImages = Array.from(document.querySelectorAll('#gallery .card-img')).map(card => {
-        const imgEl = card.querySelector('img');
-        const id = card.querySelector('.stars').dataset.imageId;
-        const userRating = card.querySelectorAll('.star.filled').length;
-        return {
-          url: imgEl.src,
-          filename: imgEl.alt,
-          id: parseInt(id, 10),
-          user_rating: userRating
-        };
-      });
-      if (!fsImages.length) return;
-      fsView.style.display = 'flex';
-      showFSImage(0);
-      document.body.style.overflow = 'hidden';
+    fsBtn.addEventListener('click', async () => {
+      await openFullscreen();
       // Yes/No voting event listeners
       setTimeout(() => {
         document.getElementById('fs-yes')?.addEventListener('click', () => rateFSYesNo('Yes'));
@@ -645,11 +845,7 @@ function showFSImage(idx) {
       }, 100);
     });
 
-    fsExit.addEventListener('click', () => {
-      fsView.style.display = 'none';
-      document.body.style.overflow = '';
-      loadGallery(); // Refresh gallery ratings after exiting fullscreen
-    });
+    fsExit.addEventListener('click', closeFullscreen);
 
     document.addEventListener('keydown', (ev) => {
       if (fsView.style.display !== 'flex') return;
@@ -663,9 +859,7 @@ function showFSImage(idx) {
       } else if (ratingType === 'yesno' && (ev.key === 'ArrowUp' || ev.key === 'ArrowDown')) {
         rateFSYesNo(ev.key === 'ArrowUp' ? 'Yes' : 'No');
       } else if (ev.key === 'Escape') {
-        fsView.style.display = 'none';
-        document.body.style.overflow = '';
-        loadGallery(); // Refresh gallery ratings after exiting fullscreen
+        closeFullscreen();
       }
     });
     // Click stars in fullscreen